@@ -3,8 +3,10 @@ Flask-based REST API for parsing address string into its component parts
 """
 from datetime import datetime
 from flask import Flask, jsonify, request
+import hashlib
 import platform
 import pytz
+import re
 import usaddress
 import yaml
 
@@ -16,6 +18,22 @@ class AddressParserError(Exception):
     pass
 
 
+# Characters removed outright during normalization, e.g. "P.O." -> "PO", "O'Brien" -> "OBRIEN".
+# Periods between digits are kept so that "1.5" and "15" remain distinct.
+NORMALIZE_DROP_RE = re.compile(r"[.'](?<!\d\.(?=\d))")
+
+# Words kept during normalization; everything else is a separator, e.g. "Apt#4" -> "APT 4"
+NORMALIZE_WORD_RE = re.compile(r"[\w&/.-]+", re.UNICODE)
+
+# Hyphens and slashes also treated as separators: those at either end of a word, and hyphens between
+# two letters, e.g. "North-West" -> "NORTH WEST".  Others are kept, e.g. "95818-1234", "1234-B", "1/2".
+NORMALIZE_SPLIT_RE = re.compile(r"(?<!\w)[-/]+|[-/]+(?!\w)|(?<=[^\W\d_])-(?=[^\W\d_])", re.UNICODE)
+
+# Words taken to be an address number when checking where an abbreviation sits, e.g. "1600",
+# "1234-B", "1/2".  Ordinals such as "5TH" are street names, not address numbers.
+ADDRESS_NUMBER_RE = re.compile(r"\d+([-/]\w+)?$", re.UNICODE)
+
+
 class USAddressParser(object):
     """
     Parser for translating address strings into the component parts
@@ -57,6 +75,149 @@ class USAddressParser(object):
         self.derived_part_mapping = {x['id']: x['parts'] for x in self.rules['address_parts']['derived']}
         self.profile_mapping = {x['id']: x['required'] for x in self.rules['profiles']}
 
+        # Maps address part ids to checks that a word is in a plausible position for that part
+        self.part_position_dispatch = {
+            'street_name_pre_directional': self.is_pre_directional_position,
+            'street_name_post_directional': self.is_post_directional_position,
+            'street_name_post_type': self.is_post_type_position,
+            'occupancy_type': self.is_occupancy_type_position,
+            'usps_box_type': self.is_usps_box_type_position
+        }
+
+        # Normalization settings used by `normalize()`
+        normalization = self.rules.get('normalization') or {}
+        self.normalization_version = normalization.get('version', 0)
+        self.abbreviation_mapping = self.build_abbreviation_mapping(normalization.get('abbreviations') or [])
+        self.phrase_lengths = self.build_phrase_lengths(self.abbreviation_mapping)
+        self.street_type_words = set(
+            word for phrase, (abbreviation, parts) in self.abbreviation_mapping.items()
+            if 'street_name_post_type' in parts for word in (phrase, abbreviation)
+        )
+
+    def build_abbreviation_mapping(self, abbreviations):
+        """
+        Flattens the "normalization" abbreviation groups into a single upper-case lookup of
+        phrase to abbreviation and the address parts it may be abbreviated as
+        """
+        abbreviation_mapping = {}
+
+        for group in abbreviations:
+            for part in group['parts']:
+                if part not in self.part_position_dispatch:
+                    raise ValueError("Normalization of part '{}' not supported.".format(part))
+
+            for phrase, abbreviation in group['words'].items():
+                phrase = ' '.join(phrase.upper().split())
+
+                if phrase in abbreviation_mapping:
+                    raise ValueError("Abbreviation for '{}' defined more than once.".format(phrase))
+
+                abbreviation_mapping[phrase] = (' '.join(abbreviation.upper().split()), group['parts'])
+
+        return abbreviation_mapping
+
+    def build_phrase_lengths(self, abbreviation_mapping):
+        """
+        Maps the first word of each abbreviated phrase to the phrase lengths, longest first
+        """
+        phrase_lengths = {}
+
+        for phrase in abbreviation_mapping:
+            words = phrase.split()
+            phrase_lengths.setdefault(words[0], []).append(len(words))
+
+        for lengths in phrase_lengths.values():
+            lengths.sort(reverse=True)
+
+        return phrase_lengths
+
+    def is_pre_directional_position(self, words, i, n):
+        """
+        Directional between the address number and a street name, e.g. "100 NORTH Main St", but not "100 NORTH St"
+        """
+        return (0 < i < len(words) - n and ADDRESS_NUMBER_RE.match(words[i - 1]) is not None and
+                words[i + n] not in self.street_type_words)
+
+    def is_post_directional_position(self, words, i, n):
+        """
+        Directional directly after a street type, e.g. "Pennsylvania Ave NORTH WEST"
+        """
+        return i > 0 and words[i - 1] in self.street_type_words
+
+    def is_post_type_position(self, words, i, n):
+        """
+        Street type after a street name, e.g. "Main STREET", but not "100 COURT St"
+        """
+        return i > 0 and ADDRESS_NUMBER_RE.match(words[i - 1]) is None
+
+    def is_occupancy_type_position(self, words, i, n):
+        """
+        Occupancy type followed by its identifier, e.g. "SUITE 5"
+        """
+        return 0 < i < len(words) - n
+
+    def is_usps_box_type_position(self, words, i, n):
+        """
+        USPS box type followed by its identifier, e.g. "POST OFFICE BOX 12"
+        """
+        return i < len(words) - n
+
+    def abbreviate(self, words, i):
+        """
+        Finds the longest abbreviated phrase starting at `words[i]` that is in a plausible position for one
+        of its address parts, e.g. "NORTH WEST" before "NORTH", returning its abbreviation and length in words
+        """
+        for phrase_len in self.phrase_lengths[words[i]]:
+            if i + phrase_len > len(words):
+                continue
+
+            phrase = ' '.join(words[i:i + phrase_len])
+
+            if phrase not in self.abbreviation_mapping:
+                continue
+
+            abbreviation, parts = self.abbreviation_mapping[phrase]
+
+            for part in parts:
+                if self.part_position_dispatch[part](words, i, phrase_len):
+                    return abbreviation, phrase_len
+
+        return words[i], 1
+
+    def normalize(self, addr_str):
+        """
+        Translates an address string into its canonical form, returning it along with a stable hash key
+
+        Words are only abbreviated where they plausibly belong to the address parts listed for them in
+        the rules, e.g. "100 South St" is left as "100 SOUTH ST", while "100 South Main St" becomes
+        "100 S MAIN ST".  The key also covers `normalization_version`, so keys only match when built
+        from the same rules.
+        """
+        addr_str = NORMALIZE_DROP_RE.sub('', addr_str.upper())
+        words = NORMALIZE_WORD_RE.findall(addr_str)
+
+        # Only the few words with hyphens or slashes need the slower separator check
+        if '-' in addr_str or '/' in addr_str:
+            words = NORMALIZE_SPLIT_RE.sub(' ', ' '.join(words)).split()
+
+        # Only words starting an abbreviated phrase need the slower lookup in `abbreviate()`
+        normalized_words = []
+        i = 0
+
+        while i < len(words):
+            if words[i] in self.phrase_lengths:
+                normalized_word, n = self.abbreviate(words, i)
+            else:
+                normalized_word, n = words[i], 1
+
+            normalized_words.append(normalized_word)
+            i += n
+
+        normalized = ' '.join(normalized_words)
+        key = hashlib.sha1(u'{}:{}'.format(self.normalization_version, normalized).encode('utf-8')).hexdigest()
+
+        return normalized, key
+
     def parse_with_usaddress_parse(self, addr_str):
         """
         Parses address string using usaddress's `parse()` function
@@ -186,10 +347,14 @@ def parse():
 
     profile = params.get('profile', None)
 
+    normalized, key = PARSER.normalize(addr_str)
     addr_parts = PARSER.parse(addr_str, profile)
 
     response = {
         'input': addr_str,
+        'normalized': normalized,
+        'key': key,
+        'keyVersion': PARSER.normalization_version,
         'parts': addr_parts
     }
 
@@ -219,15 +384,21 @@ def parse_batch():
     failed = []
 
     for addr_str in addresses:
+        normalized, key = PARSER.normalize(addr_str)
+
         try:
             addr_parts = PARSER.parse(addr_str, profile)
         except AddressParserError as ape:
             # FIXME: Python3 chained exceptions would be helpful here.
             app.logger.warn('Could not parse address "{}": {}'.format(addr_str, ape.message))
             failed.append(addr_str)
+            continue
 
         parsed.append({
             'input': addr_str,
+            'normalized': normalized,
+            'key': key,
+            'keyVersion': PARSER.normalization_version,
             'parts': addr_parts
         })
 
@@ -0,0 +1,54 @@
+"""
+Compares the cost of address normalization against usaddress tagging
+
+Run from the project root:
+
+    python tests/benchmark.py
+
+Exits non-zero if normalization is not at least `MIN_RATIO` times cheaper than tagging.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa
+
+ADDRESSES = [
+    '1600 Pennsylvania Avenue North West, Washington, DC 20006',
+    '1234 Main St., Suite #5, Sacramento CA 95818-1234',
+    'P.O. Box 12, Sacramento, CA 95818',
+    '12 1/2 North Elm Ave Apt 4 El Paso TX 88530'
+]
+NUMBER = 200
+REPEAT = 7
+
+# Normalization must cost far less than tagging.  Measured ratios are typically 15-25x, leaving
+# headroom for noise on shared CI hosts.
+MIN_RATIO = 10
+
+
+def benchmark(func):
+    """
+    Returns the best mean time in microseconds to call `func` on each of `ADDRESSES`
+    """
+    timer = timeit.Timer(lambda: [func(addr_str) for addr_str in ADDRESSES])
+    best = min(timer.repeat(repeat=REPEAT, number=NUMBER))
+
+    return best / (NUMBER * len(ADDRESSES)) * 1000000
+
+
+if __name__ == '__main__':
+    parser = app.USAddressParser()
+
+    normalize_usec = benchmark(parser.normalize)
+    tag_usec = benchmark(parser.parse_with_usaddress_tag)
+
+    print('normalize: {:8.1f} usec/address'.format(normalize_usec))
+    print('tag:       {:8.1f} usec/address'.format(tag_usec))
+    ratio = tag_usec / normalize_usec
+    print('ratio:     {:8.1f}x (min {}x)'.format(ratio, MIN_RATIO))
+
+    if ratio < MIN_RATIO:
+        sys.exit('Normalization is only {:.1f}x cheaper than tagging, below the minimum of {}x'.format(ratio, MIN_RATIO))
@@ -3,6 +3,7 @@ Unit and integration tests for grasshopper-parser
 """
 import app
 from flask import json
+import hashlib
 from nose.tools import assert_equals, assert_false, assert_raises, assert_true
 import yaml
 
@@ -16,6 +17,15 @@ class TestUSAddressParser(object):
         with open("rules.yaml", 'r') as f:
             self.yaml_rules = yaml.safe_load(f)
 
+        # Minimal well-formed rules, extended by tests that need custom "normalization" settings
+        self.empty_rules = {
+            'address_parts': {
+                'standard': {},
+                'derived': {}
+            },
+            'profiles': {}
+        }
+
     def test_init_default(self):
         """
         PARSER: init - default
@@ -109,6 +119,159 @@ class TestUSAddressParser(object):
         actual = cut.parse_with_usaddress_tag(addr_str)
         assert_equals(actual, expected)
 
+    def test_normalize(self):
+        """
+        PARSER: normalize - casing, punctuation, whitespace and abbreviations
+        """
+        # Setup
+        addr_str = '  1234-B main  STREET, Suite #5,sacramento CA 95818-1234 '
+        expected = '1234-B MAIN ST STE 5 SACRAMENTO CA 95818-1234'
+        cut = app.USAddressParser()
+
+        # Test
+        normalized, key = cut.normalize(addr_str)
+        assert_equals(normalized, expected)
+        assert_equals(key, hashlib.sha1('1:{}'.format(expected).encode('utf-8')).hexdigest())
+
+    def test_normalize_equivalent_addresses(self):
+        """
+        PARSER: normalize - equivalent address strings share the same key
+        """
+        # Setup
+        equivalent_addr_strs = [
+            [
+                '1600 Pennsylvania Ave NW Washington DC 20006',
+                '1600 PENNSYLVANIA AVENUE N.W., WASHINGTON, DC 20006',
+                '1600  pennsylvania ave. nw - washington dc 20006',
+                '1600 Pennsylvania Avenue North West Washington DC 20006',
+                '1600 Pennsylvania Avenue North-West Washington DC 20006',
+                '1600 Pennsylvania Ave N W Washington DC 20006'
+            ],
+            [
+                'PO Box 12 Sacramento CA 95818',
+                'P.O. Box 12, Sacramento, CA 95818',
+                'P O Box 12 Sacramento CA 95818',
+                'Post Office Box 12 Sacramento CA 95818',
+                'POBox 12 Sacramento CA 95818'
+            ],
+            [
+                '1234 Main St Suite #5 Sacramento CA 95818',
+                '1234 Main St Ste 5 Sacramento CA 95818',
+                '1234 Main St, Ste. #5, Sacramento CA 95818'
+            ],
+            [
+                '1234 Main St Apt#5 Sacramento CA 95818',
+                '1234 Main St Apt 5 Sacramento CA 95818',
+                '1234 Main St Apartment #5 Sacramento CA 95818'
+            ]
+        ]
+        cut = app.USAddressParser()
+
+        # Test
+        for addr_strs in equivalent_addr_strs:
+            keys = set(cut.normalize(addr_str)[1] for addr_str in addr_strs)
+            assert_equals(len(keys), 1)
+
+    def test_normalize_distinct_addresses(self):
+        """
+        PARSER: normalize - periods between digits are kept, so distinct addresses get distinct keys
+        """
+        # Setup
+        cut = app.USAddressParser()
+
+        # Test
+        normalized, key = cut.normalize('1.5 Main')
+        assert_equals(normalized, '1.5 MAIN')
+        assert_true(key != cut.normalize('15 Main')[1])
+
+    def test_normalize_by_position(self):
+        """
+        PARSER: normalize - words are only abbreviated in a plausible position for their address parts
+        """
+        # Setup
+        addr_strs = {
+            '100 South Main Street': '100 S MAIN ST',
+            '100 South St': '100 SOUTH ST',
+            '100 S St': '100 S ST',
+            '12 Court Street': '12 COURT ST',
+            '12 5th Avenue North': '12 5TH AVE N',
+            'West Sacramento CA 95691': 'WEST SACRAMENTO CA 95691',
+            'Suite': 'SUITE'
+        }
+        cut = app.USAddressParser()
+
+        # Test
+        for addr_str, expected in addr_strs.items():
+            assert_equals(cut.normalize(addr_str)[0], expected)
+
+    def test_normalize_without_rules(self):
+        """
+        PARSER: normalize - rules with missing or empty "normalization" section
+        """
+        for normalization in [None, {'abbreviations': None}]:
+            # Setup
+            rules = dict(self.empty_rules, normalization=normalization)
+            cut = app.USAddressParser(rules=rules)
+
+            # Test
+            normalized, key = cut.normalize('1234 Main Street')
+            assert_equals(normalized, '1234 MAIN STREET')
+            assert_equals(key, hashlib.sha1('0:1234 MAIN STREET'.encode('utf-8')).hexdigest())
+
+    def test_normalize_with_rules_lower_case(self):
+        """
+        PARSER: normalize - custom abbreviations are matched regardless of case
+        """
+        # Setup
+        rules = dict(self.empty_rules, normalization={
+            'version': 2,
+            'abbreviations': [
+                {'parts': ['street_name_post_type'], 'words': {'street': 'st'}},
+                {'parts': ['usps_box_type'], 'words': {'post  office box': 'po box'}}
+            ]
+        })
+        cut = app.USAddressParser(rules=rules)
+
+        # Test
+        normalized, key = cut.normalize('1234 Main Street Post Office Box 5')
+        assert_equals(normalized, '1234 MAIN ST PO BOX 5')
+        assert_equals(key, hashlib.sha1('2:1234 MAIN ST PO BOX 5'.encode('utf-8')).hexdigest())
+
+    def test_init_with_rules_duplicate_abbreviation(self):
+        """
+        PARSER: init - with the same abbreviated word in two groups
+        """
+        # Setup
+        rules = dict(self.empty_rules, normalization={
+            'abbreviations': [
+                {'parts': ['street_name_post_type'], 'words': {'COURT': 'CT'}},
+                {'parts': ['street_name_post_type'], 'words': {'court': 'CRT'}}
+            ]
+        })
+
+        # Test
+        with assert_raises(ValueError) as context:
+            app.USAddressParser(rules=rules)
+
+        err_msg = context.exception.message
+        assert_equals(err_msg, "Abbreviation for 'COURT' defined more than once.")
+
+    def test_init_with_rules_unsupported_abbreviation_part(self):
+        """
+        PARSER: init - with abbreviations for an address part that has no normalization support
+        """
+        # Setup
+        rules = dict(self.empty_rules, normalization={
+            'abbreviations': [{'parts': ['city_name'], 'words': {'SAINT': 'ST'}}]
+        })
+
+        # Test
+        with assert_raises(ValueError) as context:
+            app.USAddressParser(rules=rules)
+
+        err_msg = context.exception.message
+        assert_equals(err_msg, "Normalization of part 'city_name' not supported.")
+
 
 class TestAPI(object):
 
@@ -183,8 +346,12 @@ class TestAPI(object):
         """
         # Setup
         addr_str = '1600 Pennsylvania Ave NW Washington DC 20006'
+        normalized = '1600 PENNSYLVANIA AVE NW WASHINGTON DC 20006'
         expected = {
             'input': addr_str,
+            'normalized': normalized,
+            'key': hashlib.sha1('1:{}'.format(normalized).encode('utf-8')).hexdigest(),
+            'keyVersion': 1,
             'parts': [
                 {'code': 'address_number', 'value': '1600'},
                 {'code': 'street_name', 'value': 'Pennsylvania'},
@@ -210,8 +377,12 @@ class TestAPI(object):
         # Setup
         profile = 'grasshopper'
         addr_str = '1600 Pennsylvania Ave NW Washington DC 20006'
+        normalized = '1600 PENNSYLVANIA AVE NW WASHINGTON DC 20006'
         expected = {
             'input': addr_str,
+            'normalized': normalized,
+            'key': hashlib.sha1('1:{}'.format(normalized).encode('utf-8')).hexdigest(),
+            'keyVersion': 1,
             'parts': [
                 {'code': 'address_number', 'value': '1600'},
                 {'code': 'street_name', 'value': 'Pennsylvania'},
@@ -292,6 +463,7 @@ class TestAPI(object):
             ]
         }
         req_json = json.dumps(req_data)
+        normalized = '1234 MAIN ST SOMEWHERESVILLE CA 91234'
 
         # Test
         resp = self.app.post('/parse', data=req_json)
@@ -301,6 +473,9 @@ class TestAPI(object):
         assert_false(resp_data['failed'])
         assert_equals(len(req_data['addresses']), len(resp_data['parsed']))
         assert_equals(len(resp_data['parsed'][0]['parts']), 7)
+        assert_equals(resp_data['parsed'][1]['normalized'], normalized)
+        assert_equals(resp_data['parsed'][1]['key'], hashlib.sha1('1:{}'.format(normalized).encode('utf-8')).hexdigest())
+        assert_equals(resp_data['parsed'][1]['keyVersion'], 1)
 
     def test_parse_batch_with_failed_parse(self):
         """
@@ -309,19 +484,24 @@ class TestAPI(object):
         # Setup
         req_data = {
             'addresses': [
-                '1600 Pennsylvania Ave NW Washington DC 20006',
-                '5 Arapahoe Plaza El Paso TX 88530'
+                '1234 Main St. 1234 Main St., Sacramento, CA 95818',
+                '1600 Pennsylvania Ave NW Washington DC 20006'
             ]
         }
         req_json = json.dumps(req_data)
+        normalized = '1600 PENNSYLVANIA AVE NW WASHINGTON DC 20006'
 
         # Test
         resp = self.app.post('/parse', data=req_json)
         resp_data = json.loads(resp.data)
 
         assert_equals(200, resp.status_code)
-        assert_equals(resp_data['failed'][0], '5 Arapahoe Plaza El Paso TX 88530')
+        assert_equals(resp_data['failed'], ['1234 Main St. 1234 Main St., Sacramento, CA 95818'])
+        assert_equals(len(resp_data['parsed']), 1)
         assert_equals(resp_data['parsed'][0]['input'], '1600 Pennsylvania Ave NW Washington DC 20006')
+        assert_equals(resp_data['parsed'][0]['normalized'], normalized)
+        assert_equals(resp_data['parsed'][0]['key'], hashlib.sha1('1:{}'.format(normalized).encode('utf-8')).hexdigest())
+        assert_equals(resp_data['parsed'][0]['keyVersion'], 1)
 
     def test_parse_batch_with_no_addresses(self):
         """